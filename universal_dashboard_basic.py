@@ -1,31 +1,275 @@
 # Filename: universal_dashboard_basic.py
 import streamlit as st
-import pandas as pd
+import sqlite3
 import pickle
 from datetime import date
-import plotly.express as px
-import random
 import os
 
 # -------------------------------
 # Safe data file location (same folder as the app)
 # -------------------------------
-DATA_FILE = "dashboard_data_basic.pkl"
+DB_FILE = "dashboard_data_basic.db"
+LEGACY_PICKLE_FILE = "dashboard_data_basic.pkl"
+LEGACY_PICKLE_BAD = LEGACY_PICKLE_FILE + ".bad"
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "rb") as f:
-                return pickle.load(f)
-        except Exception as e:
-            # if corrupted, start fresh
-            return {"tasks": [], "notes": [], "habits": [], "mood_log": []}
-    else:
-        return {"tasks": [], "notes": [], "habits": [], "mood_log": []}
+PRIORITIES = ("Low", "Medium", "High")
+PRIORITY_IDX = {p: i for i, p in enumerate(PRIORITIES)}
+STATUSES = ("Pending", "Completed")
+STATUS_IDX = {s: i for i, s in enumerate(STATUSES)}
+MOOD_OPTIONS = ("😢 Sad", "😐 Meh", "🙂 Good", "😃 Great", "🤩 Awesome")
+MOOD_SCORE = {m: i + 1 for i, m in enumerate(MOOD_OPTIONS)}
 
-def save_data(data):
-    with open(DATA_FILE, "wb") as f:
-        pickle.dump(data, f)
+# -------------------------------
+# Storage: SQLite in WAL mode, one table per section
+# -------------------------------
+# AUTOINCREMENT throughout: record ids end up in widget and session_state keys,
+# so the id of a deleted record must never be handed to a new one
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    due TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS habits (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    streak INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS mood_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    mood TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('reset_generation', 0);
+"""
+SCHEMA_VERSION = 1
+
+def _connect():
+    # autocommit, so every statement below is its own transaction
+    conn = sqlite3.connect(DB_FILE, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+@st.cache_resource(show_spinner=False)
+def _init_db():
+    # schema and legacy import run once per process, on a connection of their own;
+    # returns the import problems still to be shown
+    conn = _connect()
+    notices = []
+    try:
+        conn.executescript(SCHEMA)
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            notice = _import_legacy(conn)
+            if notice:
+                notices.append(notice)
+    finally:
+        conn.close()
+    return notices
+
+def get_conn():
+    # one connection per browser session: a session runs one script at a time, so
+    # its BEGIN ... COMMIT blocks never interleave; other sessions are kept apart
+    # by SQLite's own locking (check_same_thread is off only because successive
+    # reruns of a session may land on different threads)
+    notices = _init_db()
+    # the list is the cached object itself, so each problem is shown once, not on every rerun
+    while notices:
+        st.error(notices.pop())
+    if "_conn" not in st.session_state:
+        st.session_state["_conn"] = _connect()
+    return st.session_state["_conn"]
+
+def reset_data(conn):
+    with conn:
+        conn.execute("BEGIN")
+        for table in ("tasks", "notes", "habits", "mood_log"):
+            conn.execute(f"DELETE FROM {table}")
+        # bumped in the same transaction, so a session's mood frame can't outlive the data
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'reset_generation'")
+
+def reset_generation(conn):
+    return conn.execute("SELECT value FROM meta WHERE key = 'reset_generation'").fetchone()[0]
+
+# -------------------------------
+# Legacy pickle store, read once and imported into SQLite
+# -------------------------------
+def _read_legacy():
+    # each table was a list of record dicts; older records may lack later fields
+    if not os.path.exists(LEGACY_PICKLE_FILE):
+        return None
+    with open(LEGACY_PICKLE_FILE, "rb") as f:
+        raw = pickle.load(f)
+    today = date.today().isoformat()
+    return {
+        "tasks": [(t.get("name", ""), t.get("priority", "Low"), t.get("due", today), t.get("status", "Pending"))
+                  for t in raw.get("tasks", [])],
+        "notes": [(n.get("title", ""), n.get("content", ""), n.get("date", today)) for n in raw.get("notes", [])],
+        "habits": [(h.get("name", ""), h.get("streak", 0)) for h in raw.get("habits", [])],
+        # a mood without its value can't be charted, so it isn't carried over
+        "mood_log": [(m.get("date", today), m["mood"]) for m in raw.get("mood_log", []) if "mood" in m],
+    }
+
+def _import_legacy(conn):
+    # one-shot: copy the old pickle store into the fresh database. An unreadable
+    # file is set aside rather than unpickled again on every rerun, and the
+    # database starts empty; the returned message says where the file went.
+    notice = None
+    try:
+        data = _read_legacy()
+    except Exception as e:
+        os.replace(LEGACY_PICKLE_FILE, LEGACY_PICKLE_BAD)
+        data = None
+        notice = f"Could not import `{LEGACY_PICKLE_FILE}` ({e}); it was moved to `{LEGACY_PICKLE_BAD}`."
+    with conn:
+        conn.execute("BEGIN")
+        if data is not None:
+            conn.executemany("INSERT INTO tasks (name, priority, due, status) VALUES (?, ?, ?, ?)", data["tasks"])
+            conn.executemany("INSERT INTO notes (title, content, date) VALUES (?, ?, ?)", data["notes"])
+            conn.executemany("INSERT INTO habits (name, streak) VALUES (?, ?)", data["habits"])
+            conn.executemany("INSERT INTO mood_log (date, mood) VALUES (?, ?)", data["mood_log"])
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return notice
+
+# -------------------------------
+# Mood chart
+# -------------------------------
+def mood_frame(conn):
+    # kept in session_state and grown by the rows logged since the last rerun, so
+    # only new rows are read and converted; pd.concat still copies the frame, so
+    # each batch costs O(N) in the log length
+    # pandas and plotly are imported lazily: until a mood is logged the frame is
+    # None and neither is loaded
+    df = st.session_state.get("mood_df")
+    last_id = st.session_state.get("mood_last_id", 0)
+    # a frame built before the latest reset holds rows that are gone; reading the
+    # generation is one primary-key lookup per run, the same cost as probing for
+    # the last seen row, but it holds however reset empties the table
+    generation = reset_generation(conn)
+    if st.session_state.get("mood_generation") != generation:
+        df, last_id = None, 0
+    rows = conn.execute("SELECT id, date, mood FROM mood_log WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+    if rows:
+        import pandas as pd
+        new = pd.DataFrame([(d, m, MOOD_SCORE.get(m)) for _, d, m in rows], columns=["date", "mood", "score"])
+        df = new if df is None else pd.concat([df, new], ignore_index=True)
+        last_id = rows[-1][0]
+    st.session_state["mood_df"] = df
+    st.session_state["mood_last_id"] = last_id
+    st.session_state["mood_generation"] = generation
+    return df, last_id
+
+# only the newest key is ever asked for again, so older figures are evicted
+@st.cache_data(show_spinner=False, max_entries=2)
+def build_mood_fig(n, last_id, _df):
+    # rows are only ever appended and mood_log's AUTOINCREMENT ids survive a reset,
+    # so the count and newest id identify the log; the leading underscore keeps
+    # Streamlit from hashing the DataFrame
+    import plotly.express as px
+    return px.line(_df, x="date", y="score", title="Mood over time")
+
+# -------------------------------
+# Per-record fragments: a click inside one reruns only that record
+# -------------------------------
+# Clicks are read from session_state and applied before the record is drawn, so
+# the labels are current without a rerun, in full runs and fragment runs alike.
+# A click that changes what the Snapshot counts (or empties a section) reruns
+# the whole app instead, since a fragment rerun can't redraw anything outside it.
+
+def _fresh(conn, kind, i, row, sql):
+    # rows come from the full run's single SELECT; a fragment rerun keeps those
+    # arguments, so a record changed since then is re-read by id
+    if (kind, i) in st.session_state.get("changed_rows", ()):
+        return conn.execute(sql, (i,)).fetchone()
+    return row
+
+def _changed(kind, i):
+    st.session_state.setdefault("changed_rows", set()).add((kind, i))
+
+@st.fragment
+def render_task(conn, i, row):
+    counts_changed = False
+    if st.session_state.get(f"done_{i}"):
+        cur = conn.execute("UPDATE tasks SET status = 'Completed' WHERE id = ? AND status != 'Completed'", (i,))
+        counts_changed = cur.rowcount > 0
+    if st.session_state.get(f"save_{i}"):
+        (old_status,) = conn.execute("SELECT status FROM tasks WHERE id = ?", (i,)).fetchone()
+        conn.execute(
+            "UPDATE tasks SET name = ?, priority = ?, due = ?, status = ? WHERE id = ?",
+            (st.session_state[f"edit_name_{i}"].strip(), st.session_state[f"edit_prio_{i}"],
+             st.session_state[f"edit_due_{i}"].isoformat(), st.session_state[f"edit_status_{i}"], i),
+        )
+        st.session_state[f"editing_{i}"] = False
+        # kept in session_state so the message survives an app rerun triggered below
+        st.session_state[f"updated_{i}"] = True
+        _changed("task", i)
+        counts_changed = old_status != st.session_state[f"edit_status_{i}"]
+    if st.session_state.get(f"delete_{i}"):
+        conn.execute("DELETE FROM tasks WHERE id = ?", (i,))
+        counts_changed = True
+    if counts_changed:
+        st.rerun()
+    updated = st.session_state.pop(f"updated_{i}", False)
+    if st.session_state.get(f"edit_{i}"):
+        st.session_state[f"editing_{i}"] = not st.session_state.get(f"editing_{i}", False)
+    row = _fresh(conn, "task", i, row, "SELECT name, priority, due, status FROM tasks WHERE id = ?")
+    if row is None:
+        return
+    name, prio, due, status = row
+    with st.expander(f"{name} — {status} (Priority: {prio})", expanded=updated):
+        st.write(f"**Due:** {due}")
+        cols = st.columns([1,1,1])
+        cols[0].button(f"Mark Done ✅ {i}", key=f"done_{i}")
+        cols[1].button(f"Edit ✏️ {i}", key=f"edit_{i}")
+        cols[2].button(f"Delete ❌ {i}", key=f"delete_{i}")
+        if updated:
+            st.success("Task updated.")
+        if st.session_state.get(f"editing_{i}"):
+            # simple inline edit modal-like; stays open until saved or Edit is clicked again
+            st.text_input("Edit name", value=name, key=f"edit_name_{i}")
+            st.selectbox("Edit priority", PRIORITIES, index=PRIORITY_IDX[prio], key=f"edit_prio_{i}")
+            st.date_input("Edit due date", value=date.fromisoformat(due), key=f"edit_due_{i}")
+            st.selectbox("Status", STATUSES, index=STATUS_IDX[status], key=f"edit_status_{i}")
+            st.button("Save changes", key=f"save_{i}")
+
+@st.fragment
+def render_note(conn, idx, row):
+    if st.session_state.get(f"delete_note_{idx}"):
+        conn.execute("DELETE FROM notes WHERE id = ?", (idx,))
+        st.rerun()
+    row = _fresh(conn, "note", idx, row, "SELECT title, content, date FROM notes WHERE id = ?")
+    if row is None:
+        return
+    title, content, n_date = row
+    with st.expander(f"{title} — {n_date}", expanded=False):
+        st.write(content)
+        st.button(f"Delete Note ❌ {idx}", key=f"delete_note_{idx}")
+
+@st.fragment
+def render_habit(conn, h_idx, row):
+    row = _fresh(conn, "habit", h_idx, row, "SELECT name, streak FROM habits WHERE id = ?")
+    if row is None:
+        return
+    h_name, streak = row
+    cols = st.columns([4,1])
+    # handle the button before writing the label so a tick shows without a rerun
+    if cols[1].button(f"Mark today ✅ {h_idx}"):
+        streak += 1
+        conn.execute("UPDATE habits SET streak = ? WHERE id = ?", (streak, h_idx))
+        _changed("habit", h_idx)
+    cols[0].write(f"{h_name} — Streak: {streak}")
 
 # -------------------------------
 # App setup
@@ -33,8 +277,10 @@ def save_data(data):
 st.set_page_config(page_title="Universal Dashboard (Basic)", layout="wide")
 st.title("🌐 Universal Dashboard — Basic")
 
-# Load or initialize data
-data = load_data()
+# Open (and on first run, create or migrate) the database
+conn = get_conn()
+# this is a full run, so every record below is drawn from a fresh SELECT
+st.session_state["changed_rows"] = set()
 
 # Sidebar controls
 st.sidebar.header("App Controls")
@@ -48,10 +294,9 @@ if theme == "Dark":
         unsafe_allow_html=True
     )
 
-st.sidebar.write("Persistent storage: `dashboard_data_basic.pkl`")
+st.sidebar.write(f"Persistent storage: `{DB_FILE}`")
 if st.sidebar.button("Reset all data"):
-    data = {"tasks": [], "notes": [], "habits": [], "mood_log": []}
-    save_data(data)
+    reset_data(conn)
     st.sidebar.success("All data cleared. Refresh the page.")
 
 # -------------------------------
@@ -60,53 +305,23 @@ if st.sidebar.button("Reset all data"):
 st.header("📋 Tasks")
 with st.expander("Add a new task", expanded=False):
     task_name = st.text_input("Task name", key="new_task_name")
-    priority = st.selectbox("Priority", ["Low", "Medium", "High"], key="new_task_priority")
+    priority = st.selectbox("Priority", PRIORITIES, key="new_task_priority")
     due_date = st.date_input("Due date", value=date.today(), key="new_task_due")
     add_task = st.button("Add task", key="add_task_btn")
     if add_task:
         if not task_name.strip():
             st.warning("Please enter a task name.")
         else:
-            data['tasks'].append({
-                "name": task_name.strip(),
-                "priority": priority,
-                "due": due_date.isoformat(),
-                "status": "Pending",
-            })
-            save_data(data)
+            conn.execute(
+                "INSERT INTO tasks (name, priority, due, status) VALUES (?, ?, ?, ?)",
+                (task_name.strip(), priority, due_date.isoformat(), "Pending"),
+            )
             st.success("Task added.")
-            st.experimental_rerun()
-
-if data.get("tasks"):
-    for i, t in enumerate(data["tasks"]):
-        status = t.get("status", "Pending")
-        with st.expander(f"{t['name']} — {status} (Priority: {t.get('priority','-')})", expanded=False):
-            st.write(f"**Due:** {t.get('due','-')}")
-            cols = st.columns([1,1,1])
-            if cols[0].button(f"Mark Done ✅ {i}"):
-                data["tasks"][i]["status"] = "Completed"
-                save_data(data)
-                st.experimental_rerun()
-            if cols[1].button(f"Edit ✏️ {i}"):
-                # simple inline edit modal-like
-                new_name = st.text_input("Edit name", value=t["name"], key=f"edit_name_{i}")
-                new_priority = st.selectbox("Edit priority", ["Low","Medium","High"], index=["Low","Medium","High"].index(t.get("priority","Low")), key=f"edit_prio_{i}")
-                new_due = st.date_input("Edit due date", value=date.fromisoformat(t.get("due", date.today().isoformat())), key=f"edit_due_{i}")
-                new_status = st.selectbox("Status", ["Pending","Completed"], index=0 if t.get("status","Pending")=="Pending" else 1, key=f"edit_status_{i}")
-                if st.button("Save changes", key=f"save_{i}"):
-                    data["tasks"][i].update({
-                        "name": new_name.strip(),
-                        "priority": new_priority,
-                        "due": new_due.isoformat(),
-                        "status": new_status
-                    })
-                    save_data(data)
-                    st.success("Task updated.")
-                    st.experimental_rerun()
-            if cols[2].button(f"Delete ❌ {i}"):
-                data["tasks"].pop(i)
-                save_data(data)
-                st.experimental_rerun()
+
+tasks = conn.execute("SELECT id, name, priority, due, status FROM tasks ORDER BY id").fetchall()
+if tasks:
+    for i, *row in tasks:
+        render_task(conn, i, row)
 else:
     st.info("No tasks yet. Use the 'Add a new task' panel to create one.")
 
@@ -121,24 +336,16 @@ with st.expander("Write a new note", expanded=False):
         if not note_title.strip() or not note_body.strip():
             st.warning("Please provide both a title and content for the note.")
         else:
-            data.setdefault("notes", []).append({
-                "title": note_title.strip(),
-                "content": note_body.strip(),
-                "date": date.today().isoformat()
-            })
-            save_data(data)
+            conn.execute(
+                "INSERT INTO notes (title, content, date) VALUES (?, ?, ?)",
+                (note_title.strip(), note_body.strip(), date.today().isoformat()),
+            )
             st.success("Note saved.")
-            st.experimental_rerun()
-
-if data.get("notes"):
-    for j, n in enumerate(reversed(data["notes"])):
-        idx = len(data["notes"]) - 1 - j
-        with st.expander(f"{n['title']} — {n['date']}", expanded=False):
-            st.write(n["content"])
-            if st.button(f"Delete Note ❌ {idx}"):
-                data["notes"].pop(idx)
-                save_data(data)
-                st.experimental_rerun()
+
+notes = conn.execute("SELECT id, title, content, date FROM notes ORDER BY id DESC").fetchall()
+if notes:
+    for idx, *row in notes:
+        render_note(conn, idx, row)
 else:
     st.info("No notes yet. Add one above.")
 
@@ -150,21 +357,15 @@ with st.expander("Add a habit", expanded=False):
     habit_name = st.text_input("Habit name", key="habit_name")
     if st.button("Add habit", key="add_habit_btn"):
         if habit_name.strip():
-            data.setdefault("habits", []).append({"name": habit_name.strip(), "streak": 0})
-            save_data(data)
+            conn.execute("INSERT INTO habits (name) VALUES (?)", (habit_name.strip(),))
             st.success("Habit added.")
-            st.experimental_rerun()
         else:
             st.warning("Enter a habit name.")
 
-if data.get("habits"):
-    for h_idx, h in enumerate(data["habits"]):
-        cols = st.columns([4,1])
-        cols[0].write(f"{h['name']} — Streak: {h['streak']}")
-        if cols[1].button(f"Mark today ✅ {h_idx}"):
-            data["habits"][h_idx]["streak"] = data["habits"][h_idx].get("streak",0) + 1
-            save_data(data)
-            st.experimental_rerun()
+habits = conn.execute("SELECT id, name, streak FROM habits ORDER BY id").fetchall()
+if habits:
+    for h_idx, *row in habits:
+        render_habit(conn, h_idx, row)
 else:
     st.info("No habits yet. Add one to start tracking streaks.")
 
@@ -172,21 +373,15 @@ else:
 # Section: Mood Tracker
 # -------------------------------
 st.header("😊 Mood Tracker")
-mood_options = ["😢 Sad", "😐 Meh", "🙂 Good", "😃 Great", "🤩 Awesome"]
-mood = st.select_slider("How are you feeling today?", options=mood_options, value=mood_options[2], key="mood_slider")
+mood = st.select_slider("How are you feeling today?", options=MOOD_OPTIONS, value=MOOD_OPTIONS[2], key="mood_slider")
 if st.button("Log mood", key="log_mood_btn"):
-    data.setdefault("mood_log", []).append({"date": date.today().isoformat(), "mood": mood})
-    save_data(data)
+    conn.execute("INSERT INTO mood_log (date, mood) VALUES (?, ?)", (date.today().isoformat(), mood))
     st.success("Mood logged.")
-    st.experimental_rerun()
 
-if data.get("mood_log"):
-    df_mood = pd.DataFrame(data["mood_log"])
-    # map to numeric score
-    mapping = {mood_options[i]: i+1 for i in range(len(mood_options))}
-    df_mood["score"] = df_mood["mood"].map(mapping)
+df_mood, last_mood_id = mood_frame(conn)
+if df_mood is not None:
     try:
-        fig = px.line(df_mood, x="date", y="score", title="Mood over time")
+        fig = build_mood_fig(len(df_mood), last_mood_id, df_mood)
         st.plotly_chart(fig, use_container_width=True)
     except Exception:
         st.write(df_mood)
@@ -197,17 +392,14 @@ else:
 # Section: Dashboard Summary
 # -------------------------------
 st.header("📊 Snapshot")
-total_tasks = len(data.get("tasks", []))
-completed = sum(1 for t in data.get("tasks", []) if t.get("status") == "Completed")
+# counted after the sections, which may have applied a click to their records
+total_tasks, completed = conn.execute("SELECT COUNT(*), COALESCE(SUM(status = 'Completed'), 0) FROM tasks").fetchone()
 pending = total_tasks - completed
-total_notes = len(data.get("notes", []))
-total_habits = len(data.get("habits", []))
+total_notes = conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+total_habits = conn.execute("SELECT COUNT(*) FROM habits").fetchone()[0]
 
 col_a, col_b, col_c, col_d = st.columns(4)
 col_a.metric("Tasks total", total_tasks)
 col_b.metric("Tasks completed", completed)
 col_c.metric("Notes", total_notes)
 col_d.metric("Habits", total_habits)
-
-# Ensure save
-save_data(data)